@@ -1,16 +1,55 @@
-from collections import deque
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from array import array
+from multiprocessing import Pool, shared_memory
+import contextlib
+import csv
+import heapq
+import io
+import json
+import math
+import mmap
+import os
+import random
+import struct
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
 
 class Graph:
-    def __init__(self):
+    def __init__(self, cache_size=1024):
         self.adj_list = {}
+        self.reverse_adj = {}  # incoming roads, needed to search backwards from the goal
+        self.weights = {}  # road lengths, lined up with the neighbors in adj_list
+        self.coords = {}  # (x, y) position of each landmark, used by a_star
 
-    def add_vertex(self, name):
+        # LRU caches for route(), both get cleared whenever the graph changes
+        self.cache_size = cache_size
+        self.route_cache = OrderedDict()  # (start, goal) -> path
+        self.tree_cache = OrderedDict()  # source -> BFS parent pointers
+        self.recent_sources = OrderedDict()  # sources that missed the route cache recently
+
+        self.indexes = []  # distance indexes that get updated on every change
+
+    def add_vertex(self, name, coords=None):
         if name not in self.adj_list:
             self.adj_list[name] = []
+            self.reverse_adj[name] = []
+            self.weights[name] = []
+            self._graph_changed()
+            for index in self.indexes:
+                index.vertex_added(name)
+        if coords is not None:
+            self.coords[name] = coords
 
-    def add_edge(self, start, end):
+    def add_edge(self, start, end, weight=1):
         if start in self.adj_list and end in self.adj_list:
             self.adj_list[start].append(end)
+            self.reverse_adj[end].append(start)
+            self.weights[start].append(weight)
+            self._graph_changed()
+            for index in self.indexes:
+                index.edge_added(start, end)
         else:
             print(f"Error: One or both landmarks '{start}' or '{end}' do not exist.")
 
@@ -19,96 +58,1074 @@ class Graph:
         for vertex, edges in self.adj_list.items():
             print(f"{vertex} -> {edges}")
 
-    def bfs(self, start):
-        print("\nBFS Traversal:")
+    # generator versions of the traversals so other code can use the order without printing
+    def iter_bfs(self, start):
         visited = set()
         queue = deque([start])
 
         while queue:
             current = queue.popleft()
             if current not in visited:
-                print(current)
+                yield current
                 visited.add(current)
                 for neighbor in self.adj_list[current]:
                     if neighbor not in visited:
                         queue.append(neighbor)
 
-    def dfs(self, start):
-        print("\nDFS Traversal:")
+    def iter_dfs(self, start):
         visited = set()
         stack = [start]
 
         while stack:
             current = stack.pop()
             if current not in visited:
-                print(current)
+                yield current
                 visited.add(current)
                 for neighbor in reversed(self.adj_list[current]):
                     if neighbor not in visited:
                         stack.append(neighbor)
 
+    def bfs(self, start):
+        print("\nBFS Traversal:")
+        for landmark in self.iter_bfs(start):
+            print(landmark)
+
+    def dfs(self, start):
+        print("\nDFS Traversal:")
+        for landmark in self.iter_dfs(start):
+            print(landmark)
+
     def bfs_shortest_path(self, start, goal):
         print(f"\nShortest Path from '{start}' to '{goal}':")
         if start not in self.adj_list or goal not in self.adj_list:
             print("One or both landmarks do not exist.")
             return
 
-        visited = set()
-        queue = deque([(start, [start])])
+        # parent pointers instead of copying the whole path for every neighbor
+        parent = {start: None}
+        queue = deque([start])
 
         while queue:
-            current, path = queue.popleft()
+            current = queue.popleft()
             if current == goal:
-                print(" -> ".join(path))
+                print(" -> ".join(self._build_path(parent, goal)))
                 return
-            if current not in visited:
-                visited.add(current)
-                for neighbor in self.adj_list[current]:
-                    if neighbor not in visited:
-                        queue.append((neighbor, path + [neighbor]))
+            for neighbor in self.adj_list[current]:
+                if neighbor not in parent:
+                    parent[neighbor] = current
+                    queue.append(neighbor)
+
+        print("No path found.")
+
+    def _build_path(self, parent, goal):
+        path = []
+        current = goal
+        while current is not None:
+            path.append(current)
+            current = parent[current]
+        path.reverse()
+        return path
+
+    # shared by dijkstra, a_star and distance_field
+    # heuristic(v) has to never overestimate the remaining distance to goal. it doesn't have
+    # to be consistent: a landmark that gets a shorter distance after it was expanded is
+    # pushed again and expanded again, so its neighbours pick up the improvement
+    def _weighted_search(self, start, goal=None, heuristic=None):
+        dist = {start: 0}
+        parent = {start: None}
+        heap = [(0, 0, start)]
+
+        while heap:
+            _, current_dist, current = heapq.heappop(heap)
+            if current_dist > dist[current]:
+                continue  # stale heap entry
+            if current == goal:
+                break
+            for neighbor, weight in zip(self.adj_list[current], self.weights[current]):
+                new_dist = current_dist + weight
+                if neighbor not in dist or new_dist < dist[neighbor]:
+                    dist[neighbor] = new_dist
+                    parent[neighbor] = current
+                    estimate = new_dist + heuristic(neighbor) if heuristic else new_dist
+                    heapq.heappush(heap, (estimate, new_dist, neighbor))
+        return dist, parent
+
+    # returns (distance, path), or (inf, []) if goal can't be reached
+    def dijkstra(self, start, goal):
+        if start not in self.adj_list or goal not in self.adj_list:
+            return math.inf, []
+        dist, parent = self._weighted_search(start, goal)
+        if goal not in dist:
+            return math.inf, []
+        return dist[goal], self._build_path(parent, goal)
+
+    # straight line distance to goal as the heuristic, so roads can't be shorter than
+    # the distance between their landmarks. a road through a landmark without coords can
+    # be shorter than the straight line, so if any landmark has no coords it's plain dijkstra
+    def a_star(self, start, goal):
+        if start not in self.adj_list or goal not in self.adj_list:
+            return math.inf, []
+        if len(self.coords) < len(self.adj_list):
+            return self.dijkstra(start, goal)
+        goal_coords = self.coords[goal]
+
+        def heuristic(vertex):
+            return math.dist(self.coords[vertex], goal_coords)
+
+        dist, parent = self._weighted_search(start, goal, heuristic)
+        if goal not in dist:
+            return math.inf, []
+        return dist[goal], self._build_path(parent, goal)
+
+    # distance from start to every landmark in one pass, inf where unreachable
+    def distance_field(self, start):
+        dist, _ = self._weighted_search(start)
+        return {vertex: dist.get(vertex, math.inf) for vertex in self.adj_list}
+
+    def _graph_changed(self):
+        self.route_cache.clear()
+        self.tree_cache.clear()
+        self.recent_sources.clear()
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)  # drop the least recently used entry
+
+    # searches from both ends one level at a time, always growing the smaller frontier
+    # returns the path as a list, or None if goal can't be reached
+    def bidirectional_bfs(self, start, goal):
+        if start not in self.adj_list or goal not in self.adj_list:
+            return None
+        if start == goal:
+            return [start]
+
+        forward_parent = {start: None}
+        backward_parent = {goal: None}  # next landmark on the way to goal
+        forward_dist = {start: 0}
+        backward_dist = {goal: 0}
+        forward_frontier = [start]
+        backward_frontier = [goal]
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meet = self._expand_level(
+                    forward_frontier, self.adj_list, forward_parent, forward_dist, backward_dist)
+            else:
+                backward_frontier, meet = self._expand_level(
+                    backward_frontier, self.reverse_adj, backward_parent, backward_dist, forward_dist)
+
+            if meet is not None:
+                path = self._build_path(forward_parent, meet)
+                current = backward_parent[meet]
+                while current is not None:
+                    path.append(current)
+                    current = backward_parent[current]
+                return path
+
+        return None
+
+    # finishes the whole level before stopping so the best meeting point wins
+    def _expand_level(self, frontier, adjacency, parent, dist, other_dist):
+        next_frontier = []
+        meet = None
+        best = math.inf
+        for current in frontier:
+            for neighbor in adjacency[current]:
+                if neighbor not in parent:
+                    parent[neighbor] = current
+                    dist[neighbor] = dist[current] + 1
+                    next_frontier.append(neighbor)
+                    if neighbor in other_dist and dist[neighbor] + other_dist[neighbor] < best:
+                        best = dist[neighbor] + other_dist[neighbor]
+                        meet = neighbor
+        return next_frontier, meet
+
+    # BFS parent pointers for everything reachable from source, cached per source
+    def bfs_tree(self, source):
+        if source in self.tree_cache:
+            self.tree_cache.move_to_end(source)
+            return self.tree_cache[source]
+
+        parent = {source: None}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            for neighbor in self.adj_list[current]:
+                if neighbor not in parent:
+                    parent[neighbor] = current
+                    queue.append(neighbor)
+        self._remember(self.tree_cache, source, parent)
+        return parent
+
+    # cached shortest path query for answering lots of requests against the same graph
+    # returns a tuple so cached routes can't be changed by the caller, or None if there is no route
+    def route(self, start, goal):
+        key = (start, goal)
+        if key in self.route_cache:
+            self.route_cache.move_to_end(key)
+            return self.route_cache[key]
+
+        # a source that keeps coming back is worth one full BFS tree, after that
+        # every goal from it is just a walk up the parent pointers
+        if start in self.tree_cache or (start in self.recent_sources and start in self.adj_list):
+            tree = self.bfs_tree(start)
+            path = self._build_path(tree, goal) if goal in tree else None
+        else:
+            path = self.bidirectional_bfs(start, goal)
+            self._remember(self.recent_sources, start, True)
+        path = tuple(path) if path is not None else None
+        self._remember(self.route_cache, key, path)
+        return path
+
+    def to_csr(self):
+        edges = (
+            (start, end, weight)
+            for start in self.adj_list
+            for end, weight in zip(self.adj_list[start], self.weights[start])
+        )
+        return CSRGraph.from_edges(edges, vertices=self.adj_list, weighted=True)
+
+    # fills a new Graph straight from CSR arrays, no per-edge add_edge calls
+    @classmethod
+    def from_csr(cls, csr):
+        graph = cls()
+        names, offsets, targets = csr.names, csr.offsets, csr.targets
+        for v, name in enumerate(names):
+            graph.adj_list[name] = [names[targets[k]] for k in range(offsets[v], offsets[v + 1])]
+            graph.reverse_adj[name] = []
+            if csr.weights is not None:
+                graph.weights[name] = list(csr.weights[offsets[v]:offsets[v + 1]])
+            else:
+                graph.weights[name] = [1] * (offsets[v + 1] - offsets[v])
+        for start, ends in graph.adj_list.items():
+            for end in ends:
+                graph.reverse_adj[end].append(start)
+        return graph
+
+# compressed sparse row version of Graph for big road networks
+# landmark names are interned to integer ids and the edges live in two flat typed arrays:
+# the neighbors of vertex v are targets[offsets[v]:offsets[v + 1]]
+class CSRGraph:
+    def __init__(self, names, ids, offsets, targets, weights=None):
+        self.names = names  # id -> name
+        self.ids = ids  # name -> id
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights  # road lengths lined up with targets, None if unweighted
+
+    # edges are (start, end) pairs, or (start, end, weight) when weighted is set
+    # dedupe drops repeated start -> end roads and keeps the first one
+    @classmethod
+    def from_edges(cls, edges, vertices=(), weighted=False, dedupe=False):
+        names = []
+        ids = {}
+        for name in vertices:
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+
+        if not weighted:
+            edges = ((start, end, 1) for start, end in edges)
+
+        # first pass: intern names and keep the edge stream as flat typed arrays
+        sources = array('i')
+        dests = array('i')
+        lengths = array('d')
+        seen = set()
+        for start, end, weight in edges:
+            s = ids.get(start)
+            if s is None:
+                s = ids[start] = len(names)
+                names.append(start)
+            e = ids.get(end)
+            if e is None:
+                e = ids[end] = len(names)
+                names.append(end)
+            if dedupe:
+                key = s << 32 | e
+                if key in seen:
+                    continue
+                seen.add(key)
+            sources.append(s)
+            dests.append(e)
+            if weighted:
+                lengths.append(weight)
+
+        # counting sort by source, keeps each vertex's edges in insertion order
+        n = len(names)
+        offsets = array('q', bytes(8 * (n + 1)))
+        for s in sources:
+            offsets[s + 1] += 1
+        for v in range(n):
+            offsets[v + 1] += offsets[v]
+        targets = array('i', bytes(4 * len(dests)))
+        weights = array('d', bytes(8 * len(dests))) if weighted else None
+        fill = offsets[:-1]
+        for i, (s, e) in enumerate(zip(sources, dests)):
+            targets[fill[s]] = e
+            if weighted:
+                weights[fill[s]] = lengths[i]
+            fill[s] += 1
+        return cls(names, ids, offsets, targets, weights)
+
+    def num_vertices(self):
+        return len(self.names)
+
+    def num_edges(self):
+        return len(self.targets)
+
+    def _bfs_ids(self, source):
+        offsets, targets = self.offsets, self.targets
+        visited = bytearray(len(self.names))
+        visited[source] = 1
+        order = [source]  # doubles as the queue
+        i = 0
+        while i < len(order):
+            current = order[i]
+            i += 1
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[k]
+                if not visited[neighbor]:
+                    visited[neighbor] = 1
+                    order.append(neighbor)
+        return order
+
+    def _dfs_ids(self, source):
+        offsets, targets = self.offsets, self.targets
+        visited = bytearray(len(self.names))
+        order = []
+        stack = [source]
+        while stack:
+            current = stack.pop()
+            if not visited[current]:
+                order.append(current)
+                visited[current] = 1
+                for k in range(offsets[current + 1] - 1, offsets[current] - 1, -1):
+                    neighbor = targets[k]
+                    if not visited[neighbor]:
+                        stack.append(neighbor)
+        return order
+
+    def iter_bfs(self, start):
+        for v in self._bfs_ids(self.ids[start]):
+            yield self.names[v]
+
+    def iter_dfs(self, start):
+        for v in self._dfs_ids(self.ids[start]):
+            yield self.names[v]
+
+    def bfs(self, start):
+        print("\nBFS Traversal:")
+        for landmark in self.iter_bfs(start):
+            print(landmark)
+
+    def dfs(self, start):
+        print("\nDFS Traversal:")
+        for landmark in self.iter_dfs(start):
+            print(landmark)
+
+    def bfs_shortest_path(self, start, goal):
+        print(f"\nShortest Path from '{start}' to '{goal}':")
+        if start not in self.ids or goal not in self.ids:
+            print("One or both landmarks do not exist.")
+            return
+
+        offsets, targets = self.offsets, self.targets
+        source, target = self.ids[start], self.ids[goal]
+        parent = array('i', [-1]) * len(self.names)  # parent pointers instead of copying paths
+        parent[source] = source
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                path = [current]
+                while current != source:
+                    current = parent[current]
+                    path.append(current)
+                print(" -> ".join(self.names[v] for v in reversed(path)))
+                return
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[k]
+                if parent[neighbor] == -1:
+                    parent[neighbor] = current
+                    queue.append(neighbor)
 
         print("No path found.")
 
+# precomputed hop distances for graphs that don't change much
+# each row is a typed array of distances indexed by vertex id. the index registers itself
+# with the graph so add_vertex/add_edge update the rows in place instead of rebuilding,
+# detach() stops that once the index isn't used any more
+class DistanceIndex(ABC):
+    typecode = 'I'
+    unreachable = 2 ** 32 - 1
+    magic = b"CITYIDX2"
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.names = list(graph.adj_list)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.rows = []
+        self.build()
+        self.attach()
+
+    def attach(self):
+        if self not in self.graph.indexes:
+            self.graph.indexes.append(self)
+
+    def detach(self):
+        if self in self.graph.indexes:
+            self.graph.indexes.remove(self)
+
+    @abstractmethod
+    def build(self):
+        pass
+
+    @abstractmethod
+    def distance(self, start, goal):
+        pass
+
+    def _bfs_row(self, source, adjacency):
+        row = array(self.typecode, [self.unreachable]) * len(self.names)
+        row[self.ids[source]] = 0
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            next_dist = row[self.ids[current]] + 1
+            for neighbor in adjacency[current]:
+                neighbor_id = self.ids[neighbor]
+                if row[neighbor_id] == self.unreachable:
+                    row[neighbor_id] = next_dist
+                    queue.append(neighbor)
+        return row
+
+    # a new road before -> after can only make distances shorter,
+    # so only push the improvement outwards from after
+    def _lower_row(self, row, before, after, adjacency):
+        before_dist = row[self.ids[before]]
+        if before_dist == self.unreachable or before_dist + 1 >= row[self.ids[after]]:
+            return
+        row[self.ids[after]] = before_dist + 1
+        queue = deque([after])
+        while queue:
+            current = queue.popleft()
+            next_dist = row[self.ids[current]] + 1
+            for neighbor in adjacency[current]:
+                neighbor_id = self.ids[neighbor]
+                if next_dist < row[neighbor_id]:
+                    row[neighbor_id] = next_dist
+                    queue.append(neighbor)
+
+    def vertex_added(self, name):
+        self.ids[name] = len(self.names)
+        self.names.append(name)
+        for row in self.rows:
+            row.append(self.unreachable)
+
+    @abstractmethod
+    def edge_added(self, start, end):
+        pass
+
+    # subclasses add their own fields on top of these
+    def _header(self):
+        return {"kind": type(self).__name__, "typecode": self.typecode, "names": self.names}
+
+    # file layout: magic, header length, JSON header, then the rows back to back
+    # the header names the index class and row typecode, so loading with the wrong class fails
+    def save(self, filename):
+        header = json.dumps(self._header()).encode()
+        with open(filename, "wb") as f:
+            f.write(self.magic)
+            f.write(struct.pack("<II", len(header), len(self.rows)))
+            f.write(header)
+            for row in self.rows:
+                row.tofile(f)
+
+    @classmethod
+    def load(cls, filename, graph):
+        index = cls.__new__(cls)
+        with open(filename, "rb") as f:
+            if f.read(len(cls.magic)) != cls.magic:
+                raise ValueError(f"{filename} is not a distance index file")
+            header_size, num_rows = struct.unpack("<II", f.read(8))
+            header = json.loads(f.read(header_size))
+            if header["kind"] != cls.__name__ or header["typecode"] != cls.typecode:
+                raise ValueError(f"{filename} holds a {header['kind']} ('{header['typecode']}' rows), "
+                                 f"expected {cls.__name__}")
+            if header["names"] != list(graph.adj_list):
+                raise ValueError(f"{filename} was built for a different graph")
+            index.rows = []
+            for _ in range(num_rows):
+                row = array(cls.typecode)
+                row.fromfile(f, len(header["names"]))
+                index.rows.append(row)
+
+        index.graph = graph
+        index.names = header["names"]
+        index.ids = {name: i for i, name in enumerate(index.names)}
+        index._load_header(header)
+        index.attach()
+        return index
+
+    def _load_header(self, header):
+        pass
+
+# every pair of landmarks, n x n two-byte distances, for small graphs
+# distance() is a single array lookup
+class AllPairsIndex(DistanceIndex):
+    typecode = 'H'
+    unreachable = 2 ** 16 - 1
+
+    def build(self):
+        self.rows = [self._bfs_row(name, self.graph.adj_list) for name in self.names]
+
+    def distance(self, start, goal):
+        dist = self.rows[self.ids[start]][self.ids[goal]]
+        return math.inf if dist == self.unreachable else dist
+
+    def vertex_added(self, name):
+        super().vertex_added(name)
+        row = array(self.typecode, [self.unreachable]) * len(self.names)
+        row[-1] = 0
+        self.rows.append(row)
+
+    def edge_added(self, start, end):
+        for row in self.rows:
+            self._lower_row(row, start, end, self.graph.adj_list)
+
+# ALT landmark tables for big graphs: hop distances from and to a handful of landmarks
+# give lower and upper bounds for any pair through the triangle inequality, and the lower
+# bound is a good A* heuristic when the bounds don't already meet
+class LandmarkIndex(DistanceIndex):
+    def __init__(self, graph, num_landmarks=8):
+        self.num_landmarks = num_landmarks
+        super().__init__(graph)
+
+    # rows[:k] are distances from each landmark, rows[k:] distances to each landmark
+    def build(self):
+        self.landmarks = []
+        from_rows, to_rows = [], []
+        if not self.names:
+            self.rows = []
+            return
+
+        # start at the busiest vertex, then keep picking the vertex furthest from every landmark so far
+        graph = self.graph
+        current = max(self.names, key=lambda name: len(graph.adj_list[name]) + len(graph.reverse_adj[name]))
+        closest = [self.unreachable] * len(self.names)
+        while len(self.landmarks) < min(self.num_landmarks, len(self.names)):
+            self.landmarks.append(current)
+            from_rows.append(self._bfs_row(current, graph.adj_list))
+            to_rows.append(self._bfs_row(current, graph.reverse_adj))
+            for i in range(len(self.names)):
+                closest[i] = min(closest[i], from_rows[-1][i], to_rows[-1][i])
+            chosen = set(self.landmarks)
+            candidates = [i for i in range(len(self.names)) if self.names[i] not in chosen]
+            if not candidates:
+                break
+            current = self.names[max(candidates, key=closest.__getitem__)]
+        self.rows = from_rows + to_rows
+
+    def _header(self):
+        return dict(super()._header(), landmarks=self.landmarks)
+
+    def _load_header(self, header):
+        self.landmarks = header["landmarks"]
+        self.num_landmarks = len(self.landmarks)
+
+    def edge_added(self, start, end):
+        k = len(self.landmarks)
+        for row in self.rows[:k]:
+            self._lower_row(row, start, end, self.graph.adj_list)
+        for row in self.rows[k:]:
+            self._lower_row(row, end, start, self.graph.reverse_adj)
+
+    # (lower, upper) bounds on the hop distance in O(number of landmarks)
+    def bounds(self, start, goal):
+        u, v = self.ids[start], self.ids[goal]
+        if u == v:
+            return 0, 0
+        unreachable = self.unreachable
+        k = len(self.landmarks)
+        lower, upper = 0, math.inf
+        for i in range(k):
+            from_landmark, to_landmark = self.rows[i], self.rows[k + i]
+            if from_landmark[u] != unreachable:
+                if from_landmark[v] == unreachable:
+                    return math.inf, math.inf  # the landmark reaches start but not goal
+                lower = max(lower, from_landmark[v] - from_landmark[u])
+            if to_landmark[v] != unreachable:
+                if to_landmark[u] == unreachable:
+                    return math.inf, math.inf  # goal reaches the landmark but start doesn't
+                lower = max(lower, to_landmark[u] - to_landmark[v])
+            if to_landmark[u] != unreachable and from_landmark[v] != unreachable:
+                upper = min(upper, to_landmark[u] + from_landmark[v])
+        return lower, upper
+
+    # exact hop distance, A* guided by the landmark lower bound when the bounds don't meet
+    def distance(self, start, goal):
+        lower, upper = self.bounds(start, goal)
+        if lower == upper:
+            return lower
+
+        dist = {start: 0}
+        heap = [(lower, 0, start)]
+        while heap:
+            _, current_dist, current = heapq.heappop(heap)
+            if current == goal:
+                return current_dist
+            if current_dist > dist[current]:
+                continue
+            for neighbor in self.graph.adj_list[current]:
+                if neighbor not in dist or current_dist + 1 < dist[neighbor]:
+                    estimate = self.bounds(neighbor, goal)[0]
+                    if estimate == math.inf:
+                        continue
+                    dist[neighbor] = current_dist + 1
+                    heapq.heappush(heap, (current_dist + 1 + estimate, current_dist + 1, neighbor))
+        return math.inf
+
+# all-pairs while the n x n matrix stays small, landmark tables after that
+def build_distance_index(graph, max_all_pairs=2000):
+    if len(graph.adj_list) <= max_all_pairs:
+        return AllPairsIndex(graph)
+    return LandmarkIndex(graph)
+
+# streaming loaders for real road networks
+# each one yields (start, end, length) one road at a time so the text file is never held in memory
+
+# "start end [length]" per line, whitespace separated, # starts a comment
+def iter_edge_list(filename):
+    with open(filename) as f:
+        for line in f:
+            parts = line.split("#", 1)[0].split()
+            if len(parts) < 2:
+                continue
+            yield parts[0], parts[1], float(parts[2]) if len(parts) > 2 else 1.0
+
+# start,end[,length] columns, first row is a header
+def iter_csv_edges(filename):
+    with open(filename, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) < 2:
+                continue
+            yield row[0], row[1], float(row[2]) if len(row) > 2 and row[2] else 1.0
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(a))
+
+# OSM XML extract: roads are <way> elements tagged highway, made of <nd> references to
+# <node> coordinates. finished elements are cleared off the root to keep memory flat
+def iter_osm_edges(filename):
+    coords = {}
+    root = None
+    for event, element in ET.iterparse(filename, events=("start", "end")):
+        if root is None:
+            root = element
+        if event == "start":
+            continue
+        if element.tag == "node":
+            coords[element.get("id")] = (float(element.get("lat")), float(element.get("lon")))
+        elif element.tag == "way":
+            tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+            if "highway" in tags:
+                refs = [nd.get("ref") for nd in element.iter("nd")]
+                oneway = tags.get("oneway") in ("yes", "true", "1")
+                for start, end in zip(refs, refs[1:]):
+                    if start not in coords or end not in coords:
+                        continue
+                    length = haversine_km(*coords[start], *coords[end])
+                    yield start, end, length
+                    if not oneway:
+                        yield end, start, length
+        if element.tag in ("node", "way", "relation"):
+            root.clear()
+
+GRAPH_MAGIC = b"CITYGRF1"
+GRAPH_HEADER = struct.Struct("<8sQQQQ")  # magic, vertices, edges, names size, has weights
+
+# binary graph file: header, offsets (int64), targets (int32, padded to 8 bytes),
+# weights (float64, optional), then the landmark names as utf-8 separated by null bytes
+def save_graph(csr, filename):
+    names = "\0".join(csr.names).encode()
+    n, m = csr.num_vertices(), csr.num_edges()
+    with open(filename, "wb") as f:
+        f.write(GRAPH_HEADER.pack(GRAPH_MAGIC, n, m, len(names), csr.weights is not None))
+        f.write(memoryview(csr.offsets).cast('B'))
+        f.write(memoryview(csr.targets).cast('B'))
+        f.write(bytes(-4 * m % 8))
+        if csr.weights is not None:
+            f.write(memoryview(csr.weights).cast('B'))
+        f.write(names)
+
+# memory maps the arrays back without parsing them, only the names get decoded
+def load_graph(filename):
+    with open(filename, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, n, m, names_size, has_weights = GRAPH_HEADER.unpack_from(data)
+    if magic != GRAPH_MAGIC:
+        raise ValueError(f"{filename} is not a graph file")
+
+    view = memoryview(data)
+    position = GRAPH_HEADER.size
+    offsets = view[position:position + 8 * (n + 1)].cast('q')
+    position += 8 * (n + 1)
+    targets = view[position:position + 4 * m].cast('i')
+    position += 4 * m + (-4 * m % 8)
+    weights = None
+    if has_weights:
+        weights = view[position:position + 8 * m].cast('d')
+        position += 8 * m
+    names = bytes(view[position:position + names_size]).decode().split("\0") if n else []
+    ids = {name: i for i, name in enumerate(names)}
+    return CSRGraph(names, ids, offsets, targets, weights)
+
+# picks the loader from the file extension and bulk builds a deduplicated CSRGraph
+def load_road_network(filename):
+    if filename.endswith(".graph"):
+        return load_graph(filename)
+    if filename.endswith(".csv"):
+        edges = iter_csv_edges(filename)
+    elif filename.endswith(".osm"):
+        edges = iter_osm_edges(filename)
+    else:
+        edges = iter_edge_list(filename)
+    return CSRGraph.from_edges(edges, weighted=True, dedupe=True)
+
+# graph analytics
+
+# weakly connected components, road direction ignored
+def connected_components(graph):
+    seen = set()
+    components = []
+    for vertex in graph.adj_list:
+        if vertex in seen:
+            continue
+        seen.add(vertex)
+        component = [vertex]
+        i = 0
+        while i < len(component):
+            current = component[i]
+            i += 1
+            for neighbor in graph.adj_list[current] + graph.reverse_adj[current]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    component.append(neighbor)
+        components.append(component)
+    return components
+
+# Tarjan's algorithm with an explicit stack so big graphs don't hit the recursion limit
+def strongly_connected_components(graph):
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in graph.adj_list:
+        if root in index:
+            continue
+        work = [(root, iter(graph.adj_list[root]))]
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            current, neighbors = work[-1]
+            advanced = False
+            for neighbor in neighbors:
+                if neighbor not in index:
+                    index[neighbor] = lowlink[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    work.append((neighbor, iter(graph.adj_list[neighbor])))
+                    advanced = True
+                    break
+                if neighbor in on_stack:
+                    lowlink[current] = min(lowlink[current], index[neighbor])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[current])
+            if lowlink[current] == index[current]:
+                component = []
+                while True:
+                    vertex = stack.pop()
+                    on_stack.discard(vertex)
+                    component.append(vertex)
+                    if vertex == current:
+                        break
+                components.append(component)
+    return components
+
+def degree_stats(graph):
+    stats = {}
+    for label, adjacency in (("out", graph.adj_list), ("in", graph.reverse_adj)):
+        degrees = [len(neighbors) for neighbors in adjacency.values()]
+        if not degrees:
+            degrees = [0]
+        stats[label] = {
+            "min": min(degrees),
+            "max": max(degrees),
+            "mean": sum(degrees) / len(degrees)
+        }
+    return stats
+
+# how many landmarks (itself included) can be reached from source, using a stamp array
+# instead of a fresh visited set per source
+def _count_reachable(offsets, targets, source, stamps, stamp, queue):
+    stamps[source] = stamp
+    queue.append(source)
+    count = 0
+    while queue:
+        current = queue.popleft()
+        count += 1
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[k]
+            if stamps[neighbor] != stamp:
+                stamps[neighbor] = stamp
+                queue.append(neighbor)
+    return count
+
+def _count_reachable_range(offsets, targets, num_vertices, sources):
+    stamps = array('i', [-1]) * num_vertices
+    queue = deque()
+    return [_count_reachable(offsets, targets, source, stamps, source, queue) for source in sources]
+
+# pool workers attach to the shared CSR arrays once and keep them for every chunk
+_worker_graph = None
+
+def _init_reachability_worker(offsets_name, targets_name, num_vertices, num_edges):
+    global _worker_graph
+    offsets_memory = shared_memory.SharedMemory(name=offsets_name)
+    targets_memory = shared_memory.SharedMemory(name=targets_name)
+    # segments are at least one byte, so slice to the real size before casting
+    offsets = offsets_memory.buf[:8 * (num_vertices + 1)].cast('q')
+    targets = targets_memory.buf[:4 * num_edges].cast('i')
+    _worker_graph = (offsets_memory, targets_memory, offsets, targets, num_vertices)
+
+def _reachability_worker(sources):
+    _, _, offsets, targets, num_vertices = _worker_graph
+    return _count_reachable_range(offsets, targets, num_vertices, sources)
+
+def _to_shared_memory(values):
+    data = values.tobytes()
+    memory = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    memory.buf[:len(data)] = data
+    return memory
+
+# number of landmarks reachable from every landmark. the CSR arrays go into shared memory
+# once and the per-source BFS runs are split across a process pool
+def reachability_counts(graph, processes=None, chunk_size=256):
+    csr = graph.to_csr()
+    n = csr.num_vertices()
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or n <= chunk_size:
+        counts = _count_reachable_range(csr.offsets, csr.targets, n, range(n))
+        return dict(zip(csr.names, counts))
+
+    offsets_memory = _to_shared_memory(csr.offsets)
+    targets_memory = _to_shared_memory(csr.targets)
+    try:
+        chunks = [range(i, min(i + chunk_size, n)) for i in range(0, n, chunk_size)]
+        initargs = (offsets_memory.name, targets_memory.name, n, csr.num_edges())
+        with Pool(processes, initializer=_init_reachability_worker, initargs=initargs) as pool:
+            counts = [count for chunk in pool.map(_reachability_worker, chunks) for count in chunk]
+    finally:
+        offsets_memory.close()
+        offsets_memory.unlink()
+        targets_memory.close()
+        targets_memory.unlink()
+    return dict(zip(csr.names, counts))
+
 #city information generated by chat gpt
 def build_sample_city_graph():
     city = Graph()
 
-    landmarks = [
-        "Museum", "Library", "City Hall", "Zoo", "Aquarium",
-        "Train Station", "Stadium", "University", "Airport", "Park"
-    ]
+    # landmark -> (x, y) in km
+    landmarks = {
+        "Museum": (0, 0), "Library": (2, 1), "City Hall": (4, 2), "Zoo": (5, 0), "Aquarium": (7, -1),
+        "Train Station": (8, 1), "Stadium": (7, 4), "University": (4, 5), "Airport": (1, 7), "Park": (-1, 4)
+    }
 
-    for landmark in landmarks:
-        city.add_vertex(landmark)
+    for landmark, coords in landmarks.items():
+        city.add_vertex(landmark, coords)
 
+    # (start, end, road length in km)
     roads = [
-        ("Museum", "Library"),
-        ("Library", "City Hall"),
-        ("City Hall", "Zoo"),
-        ("Zoo", "Aquarium"),
-        ("Aquarium", "Train Station"),
-        ("Train Station", "Stadium"),
-        ("Stadium", "University"),
-        ("University", "Airport"),
-        ("Airport", "Park"),
-        ("Park", "Museum"),
-        ("Library", "Zoo"),
-        ("Zoo", "Train Station"),
-        ("City Hall", "University"),
-        ("University", "Museum"),
-        ("Stadium", "Park")
+        ("Museum", "Library", 2.5),
+        ("Library", "City Hall", 2.5),
+        ("City Hall", "Zoo", 3),
+        ("Zoo", "Aquarium", 2.5),
+        ("Aquarium", "Train Station", 2.5),
+        ("Train Station", "Stadium", 3.5),
+        ("Stadium", "University", 4),
+        ("University", "Airport", 4),
+        ("Airport", "Park", 4),
+        ("Park", "Museum", 4.5),
+        ("Library", "Zoo", 3.5),
+        ("Zoo", "Train Station", 4),
+        ("City Hall", "University", 3.5),
+        ("University", "Museum", 7),
+        ("Stadium", "Park", 8.5)
     ]
 
-    for start, end in roads:
-        city.add_edge(start, end)
+    for start, end, length in roads:
+        city.add_edge(start, end, length)
 
     return city
-    
-city_graph = build_sample_city_graph()
-city_graph.display()
 
-start_point = "Museum"
-city_graph.bfs(start_point)
-city_graph.dfs(start_point)
+# random road network for benchmarking, same edges for both versions
+def generate_random_edges(num_vertices, num_edges, seed=0):
+    rng = random.Random(seed)
+    for _ in range(num_edges):
+        yield (f"Landmark {rng.randrange(num_vertices)}", f"Landmark {rng.randrange(num_vertices)}")
+
+def measure_build(build):
+    start_time = time.perf_counter()
+    graph = build()
+    build_time = time.perf_counter() - start_time
+
+    # build a second time under tracemalloc, it slows allocation down too much to time with it on
+    del graph
+    tracemalloc.start()
+    graph = build()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return graph, build_time, memory
+
+def measure_traversals(graph, start):
+    # the traversals print every landmark, so send that to a throwaway buffer
+    with contextlib.redirect_stdout(io.StringIO()):
+        start_time = time.perf_counter()
+        graph.bfs(start)
+        graph.dfs(start)
+        graph.bfs_shortest_path(start, "Landmark 1")
+        return time.perf_counter() - start_time
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+# replays the same skewed query stream (most traffic between a few busy landmarks)
+# uncached and through the route cache, and reports per-query latency
+def benchmark_route_queries(num_vertices, num_edges, num_queries, seed=0):
+    graph = Graph(cache_size=4096)
+    for i in range(num_vertices):
+        graph.add_vertex(f"Landmark {i}")
+    for start, end in generate_random_edges(num_vertices, num_edges, seed):
+        graph.add_edge(start, end)
+
+    rng = random.Random(seed)
+    busy = [f"Landmark {rng.randrange(num_vertices)}" for _ in range(50)]
+    queries = [(rng.choice(busy), rng.choice(busy)) for _ in range(num_queries)]
+
+    print(f"\nRoute queries: {num_queries} queries over {num_vertices} landmarks, {num_edges} roads")
+    for label, answer in (("bidirectional", graph.bidirectional_bfs), ("cached", graph.route)):
+        latencies = []
+        for start, goal in queries:
+            start_time = time.perf_counter_ns()
+            answer(start, goal)
+            latencies.append(time.perf_counter_ns() - start_time)
+        latencies.sort()
+        total = sum(latencies) / 1e9
+        print(f"{label:>13}: {num_queries / total:,.0f} queries/s, "
+              f"p50 {percentile(latencies, 0.5) / 1e3:.1f}us, p99 {percentile(latencies, 0.99) / 1e3:.1f}us")
+
+def benchmark_csr(num_vertices, num_edges):
+    def build_dict():
+        graph = Graph()
+        for i in range(num_vertices):
+            graph.add_vertex(f"Landmark {i}")
+        for start, end in generate_random_edges(num_vertices, num_edges):
+            graph.add_edge(start, end)
+        return graph
+
+    def build_csr():
+        vertices = (f"Landmark {i}" for i in range(num_vertices))
+        return CSRGraph.from_edges(generate_random_edges(num_vertices, num_edges), vertices)
+
+    print(f"\nBenchmark: {num_vertices} landmarks, {num_edges} roads")
+    for label, build in (("dict", build_dict), ("csr", build_csr)):
+        graph, build_time, memory = measure_build(build)
+        traversal_time = measure_traversals(graph, "Landmark 0")
+        print(f"{label:>4}: build {build_time:.3f}s, memory {memory / 1e6:.1f} MB, traversals {traversal_time:.3f}s")
+
+# sequential vs process pool for the all-sources reachability counts
+def benchmark_reachability(num_vertices, num_edges):
+    graph = Graph()
+    for i in range(num_vertices):
+        graph.add_vertex(f"Landmark {i}")
+    for start, end in generate_random_edges(num_vertices, num_edges):
+        graph.add_edge(start, end)
+
+    print(f"\nReachability counts: {num_vertices} landmarks, {num_edges} roads")
+    for processes in sorted({1, os.cpu_count() or 1}):
+        start_time = time.perf_counter()
+        reachability_counts(graph, processes)
+        print(f"{processes:>3} processes: {time.perf_counter() - start_time:.3f}s")
+
+if __name__ == "__main__":
+    city_graph = build_sample_city_graph()
+    city_graph.display()
+
+    start_point = "Museum"
+    city_graph.bfs(start_point)
+    city_graph.dfs(start_point)
+
+    city_graph.bfs_shortest_path("Museum", "Airport")
+
+    distance, path = city_graph.dijkstra("Museum", "Stadium")
+    print(f"\nDijkstra from 'Museum' to 'Stadium': {' -> '.join(path)} ({distance} km)")
+    distance, path = city_graph.a_star("Museum", "Stadium")
+    print(f"A* from 'Museum' to 'Stadium': {' -> '.join(path)} ({distance} km)")
+
+    print("\nDistances from 'Museum':")
+    for landmark, distance in city_graph.distance_field("Museum").items():
+        print(f"{landmark}: {distance} km")
+
+    csr_city_graph = city_graph.to_csr()
+    csr_city_graph.bfs(start_point)
+    csr_city_graph.dfs(start_point)
+    csr_city_graph.bfs_shortest_path("Museum", "Airport")
+
+    print(f"\nRoute from 'Museum' to 'Airport': {' -> '.join(city_graph.route('Museum', 'Airport'))}")
+
+    distance_index = build_distance_index(city_graph)
+    distance_index.save("city_index.bin")
+    distance_index.detach()
+    distance_index = AllPairsIndex.load("city_index.bin", city_graph)
+    print(f"\nHops from 'Park' to 'Zoo': {distance_index.distance('Park', 'Zoo')}")
+    city_graph.add_edge("Park", "Zoo", 6)
+    print(f"Hops from 'Park' to 'Zoo' after adding a road: {distance_index.distance('Park', 'Zoo')}")
+
+    print("\nConnected components:", connected_components(city_graph))
+    print("Strongly connected components:", strongly_connected_components(city_graph))
+    print("Degree stats:", degree_stats(city_graph))
+    print("Reachable from each landmark:", reachability_counts(city_graph))
+
+    with open("city_roads.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["start", "end", "length"])
+        for landmark in city_graph.adj_list:
+            for neighbor, length in zip(city_graph.adj_list[landmark], city_graph.weights[landmark]):
+                writer.writerow([landmark, neighbor, length])
+    save_graph(load_road_network("city_roads.csv"), "city.graph")
+    loaded_city = Graph.from_csr(load_road_network("city.graph"))
+    distance, path = loaded_city.dijkstra("Museum", "Stadium")
+    print(f"\nLoaded from city.graph, 'Museum' to 'Stadium': {' -> '.join(path)} ({distance} km)")
 
-city_graph.bfs_shortest_path("Museum", "Airport")
+    benchmark_csr(20000, 100000)
+    benchmark_route_queries(20000, 100000, 10000)
+    benchmark_reachability(1000, 5000)
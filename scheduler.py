@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 import heapq
 from collections import defaultdict
+from sorting import introsort
 
 # Linked List Implementation
 class Node:
@@ -60,26 +61,9 @@ class AvailabilitySlot:
     def contains(self, time_slot):
         return self.start_time <= time_slot.start_time and time_slot.end_time <= self.end_time # checks if time slot is within given availability time ranges
 
-# merge sort to sort tasks
+# sorts tasks into a new list, now just introsort on a copy so the input is left alone
 def merge_sort(tasks, key=lambda x: x.deadline):
-    if len(tasks) <= 1:
-        return tasks
-    mid = len(tasks) // 2
-    left = merge_sort(tasks[:mid], key)
-    right = merge_sort(tasks[mid:], key)
-    return merge(left, right, key)
-
-def merge(left, right, key):
-    result = []
-    i = j = 0
-    while i < len(left) and j < len(right):
-        if key(left[i]) < key(right[j]):
-            result.append(left[i])
-            i += 1
-        else:
-            result.append(right[j])
-            j += 1
-    return result + left[i:] + right[j:]
+    return introsort(list(tasks), key)
 
 class Calendar:
     def __init__(self, availability_slots):
@@ -130,7 +114,7 @@ class Calendar:
         }
         if sort_by in key_funcs:
             for day in self.schedule:
-                self.schedule[day] = merge_sort(self.schedule[day], key=key_funcs[sort_by])
+                self.schedule[day] = introsort(self.schedule[day], key=key_funcs[sort_by])
             print(f"\nTasks sorted by {sort_by.capitalize()}:")
             self.display()
         else:
@@ -0,0 +1,194 @@
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")  # no window, the plot only gets saved to a file
+import matplotlib.pyplot as plt
+
+from sorting import introsort, numeric_sort, parallel_sample_sort, quick_sort
+
+# numpy is optional, the benchmark just leaves it out if it isn't installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# quick_sort recurses once per element on sorted input
+sys.setrecursionlimit(100000)
+
+# input generators, all seeded so runs can be compared
+
+def generate_random(size, rng):
+    return [rng.random() for _ in range(size)]
+
+def generate_sorted(size, rng):
+    return list(range(size))
+
+def generate_reversed(size, rng):
+    return list(range(size, 0, -1))
+
+def generate_all_equal(size, rng):
+    return [7] * size
+
+# climbs to the middle then back down, trips up pivot choices that look at both ends
+def generate_organ_pipe(size, rng):
+    half = size // 2
+    return list(range(half)) + list(range(size - half, 0, -1))
+
+# sorted with 1% of the elements swapped somewhere random
+def generate_nearly_sorted(size, rng):
+    data = list(range(size))
+    for _ in range(max(1, size // 100)):
+        i, j = rng.randrange(size), rng.randrange(size)
+        data[i], data[j] = data[j], data[i]
+    return data
+
+INPUTS = {
+    "random": generate_random,
+    "sorted": generate_sorted,
+    "reversed": generate_reversed,
+    "all_equal": generate_all_equal,
+    "organ_pipe": generate_organ_pipe,
+    "nearly_sorted": generate_nearly_sorted,
+}
+
+# each algorithm is (prepare, sort): prepare makes a fresh copy outside the timed part
+ALGORITHMS = {
+    "quick_sort": (list, quick_sort),
+    "introsort": (list, introsort),
+    "sorted": (list, sorted),
+    "numeric_sort": (list, numeric_sort),
+}
+if np is not None:
+    ALGORITHMS["numpy"] = (np.array, np.sort)
+    ALGORITHMS["sample_sort"] = (np.array, parallel_sample_sort)
+
+def time_sort(data, prepare, sort, repeats, warmup):
+    for _ in range(warmup):
+        sort(prepare(data))
+    times = []
+    for _ in range(repeats):
+        copy = prepare(data)
+        start_time = time.perf_counter()
+        sort(copy)
+        times.append(time.perf_counter() - start_time)
+    return times
+
+# guesses the time at the next size from how fast the time grew between the last two sizes,
+# so quadratic cases get cut off before they run for hours
+def estimate_time(history, size):
+    if not history:
+        return 0.0
+    last_size, last_time = history[-1]
+    exponent = 2.0
+    if len(history) > 1:
+        first_size, first_time = history[-2]
+        if first_time > 0 and last_time > 0:
+            exponent = max(1.0, math.log(last_time / first_time) / math.log(last_size / first_size))
+    return last_time * (size / last_size) ** exponent
+
+# runs every algorithm on every input kind and size. an algorithm is skipped for the rest of
+# an input kind once its estimated median time goes over time_budget seconds
+def run_benchmark(sizes, inputs=None, algorithms=None, repeats=5, warmup=1, time_budget=10.0, seed=0):
+    inputs = inputs or list(INPUTS)
+    algorithms = algorithms or list(ALGORITHMS)
+    sizes = sorted(sizes)
+    results = []
+    for kind in inputs:
+        too_slow = set()
+        history = {name: [] for name in algorithms}  # (size, median) so far
+        for size in sizes:
+            data = INPUTS[kind](size, random.Random(seed))
+            for name in algorithms:
+                record = {"algorithm": name, "input": kind, "size": size}
+                if name not in too_slow and estimate_time(history[name], size) > time_budget:
+                    too_slow.add(name)
+                if name in too_slow:
+                    record["skipped"] = f"estimated over {time_budget}s"
+                    results.append(record)
+                    continue
+
+                prepare, sort = ALGORITHMS[name]
+                try:
+                    times = time_sort(data, prepare, sort, repeats, warmup)
+                except RecursionError:
+                    record["skipped"] = "RecursionError"
+                    too_slow.add(name)
+                    results.append(record)
+                    print(f"{kind:>13} {size:>10} {name:>10}: recursion limit hit")
+                    continue
+
+                record["times"] = times
+                record["median"] = statistics.median(times)
+                record["min"] = min(times)
+                results.append(record)
+                history[name].append((size, record["median"]))
+                print(f"{kind:>13} {size:>10} {name:>10}: median {record['median']:.5f}s, min {record['min']:.5f}s")
+    return results
+
+def save_json(results, filename, repeats, warmup, seed):
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__ if np is not None else None,
+        "repeats": repeats,
+        "warmup": warmup,
+        "seed": seed,
+        "results": results,
+    }
+    with open(filename, "w") as f:
+        json.dump(report, f, indent=2)
+
+# one panel per input kind, median time against size on log-log axes
+def save_plot(results, filename):
+    kinds = list(dict.fromkeys(record["input"] for record in results))
+    columns = min(3, len(kinds))
+    rows = (len(kinds) + columns - 1) // columns
+    fig, axes = plt.subplots(rows, columns, figsize=(6 * columns, 4 * rows), squeeze=False)
+
+    for ax, kind in zip(axes.flat, kinds):
+        for name in dict.fromkeys(record["algorithm"] for record in results):
+            points = [(r["size"], r["median"]) for r in results
+                      if r["input"] == kind and r["algorithm"] == name and "median" in r]
+            if points:
+                ax.plot(*zip(*points), marker="o", label=name)
+        ax.set_title(kind.replace("_", " ").title())
+        ax.set_xlabel("Array Size")
+        ax.set_ylabel("Median Time (seconds)")
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.grid(True, linestyle="--", linewidth=0.5)
+        ax.legend()
+    for ax in list(axes.flat)[len(kinds):]:
+        ax.axis("off")
+
+    fig.tight_layout()
+    fig.savefig(filename)
+    plt.close(fig)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quick_sort against introsort, sorted and the numpy sorts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--inputs", nargs="+", choices=list(INPUTS), default=list(INPUTS))
+    parser.add_argument("--algorithms", nargs="+", choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--time-budget", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default="sort_benchmark.json")
+    parser.add_argument("--plot", default="sort_benchmark.png")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.inputs, args.algorithms, args.repeats,
+                            args.warmup, args.time_budget, args.seed)
+    save_json(results, args.json, args.repeats, args.warmup, args.seed)
+    save_plot(results, args.plot)
+    print(f"\nSaved {args.json} and {args.plot}")
+
+if __name__ == "__main__":
+    main()
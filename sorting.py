@@ -0,0 +1,305 @@
+from multiprocessing import Pool, shared_memory
+import heapq
+import os
+import pickle
+import random
+import tempfile
+import time
+
+# numpy is optional, the numeric fast paths fall back to sorted() without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# introsort: quick sort that can't go quadratic
+# - median of three pivot (median of three medians on big ranges) so sorted and
+#   reverse sorted input split evenly
+# - three way partition so runs of equal elements are finished in one pass
+# - switches to heapsort if the partitions keep coming out lopsided
+# - small ranges are left for one insertion sort pass at the end
+# sorts in place without recursion, always O(n log n)
+
+INSERTION_THRESHOLD = 16
+
+# the original list comprehension quick sort from the quick sort lab, kept for comparison
+# last element pivot, so sorted and reverse sorted input are O(n^2) and recurse n deep
+def quick_sort(arr):
+    if len(arr) <= 1:
+        return arr
+
+    pivot = arr[len(arr) - 1]
+    left = [x for x in arr if x < pivot]
+    middle = [x for x in arr if x == pivot]
+    right = [x for x in arr if x > pivot]
+
+    return quick_sort(left) + middle + quick_sort(right)
+
+# sorts arr in place and returns it, so it can stand in for merge_sort(tasks, key)
+# like list.sort, key is called once per element and the keys are sorted alongside the items
+def introsort(arr, key=None):
+    n = len(arr)
+    if n < 2:
+        return arr
+    if key is None:
+        keys, items = arr, None
+    else:
+        keys, items = [key(x) for x in arr], arr
+
+    # pending (lo, hi, depth) ranges, the smaller side is always handled first so this stays O(log n)
+    stack = [(0, n - 1, 2 * n.bit_length())]
+    while stack:
+        lo, hi, depth = stack.pop()
+        while hi - lo + 1 > INSERTION_THRESHOLD:
+            if depth == 0:
+                _heapsort(keys, items, lo, hi)
+                break
+            depth -= 1
+            pivot = _choose_pivot(keys, lo, hi)
+            lt, gt = _partition(keys, items, lo, hi, pivot)
+            if lt - lo < hi - gt:
+                stack.append((gt + 1, hi, depth))
+                hi = lt - 1
+            else:
+                stack.append((lo, lt - 1, depth))
+                lo = gt + 1
+
+    # every element is now within INSERTION_THRESHOLD of where it belongs
+    _insertion_sort(keys, items, 0, n - 1)
+    return arr
+
+# tukey's ninther on big ranges, plain median of three on small ones
+# the partition shuffles the part above the pivot, and a single median of three
+# kept landing on bad pivots in those leftovers
+def _choose_pivot(keys, lo, hi):
+    mid = (lo + hi) // 2
+    if hi - lo > 40:
+        step = (hi - lo) // 8
+        return _median_of_three(
+            _median_of_three(keys[lo], keys[lo + step], keys[lo + 2 * step]),
+            _median_of_three(keys[mid - step], keys[mid], keys[mid + step]),
+            _median_of_three(keys[hi - 2 * step], keys[hi - step], keys[hi])
+        )
+    return _median_of_three(keys[lo], keys[mid], keys[hi])
+
+def _median_of_three(a, b, c):
+    if b < a:
+        a, b = b, a
+    if c < b:
+        b = c
+        if b < a:
+            b = a
+    return b
+
+# dutch national flag partition: [lo, lt) < pivot, [lt, gt] == pivot, (gt, hi] > pivot
+def _partition(keys, items, lo, hi, pivot):
+    lt, i, gt = lo, lo, hi
+    while i <= gt:
+        current = keys[i]
+        if current < pivot:
+            keys[lt], keys[i] = current, keys[lt]
+            if items is not None:
+                items[lt], items[i] = items[i], items[lt]
+            lt += 1
+            i += 1
+        elif pivot < current:
+            keys[gt], keys[i] = current, keys[gt]
+            if items is not None:
+                items[gt], items[i] = items[i], items[gt]
+            gt -= 1
+        else:
+            i += 1
+    return lt, gt
+
+def _insertion_sort(keys, items, lo, hi):
+    for i in range(lo + 1, hi + 1):
+        current = keys[i]
+        item = items[i] if items is not None else None
+        j = i - 1
+        while j >= lo and current < keys[j]:
+            keys[j + 1] = keys[j]
+            if items is not None:
+                items[j + 1] = items[j]
+            j -= 1
+        keys[j + 1] = current
+        if items is not None:
+            items[j + 1] = item
+
+def _sift_down(keys, items, lo, root, size):
+    while True:
+        child = 2 * root + 1
+        if child >= size:
+            return
+        if child + 1 < size and keys[lo + child] < keys[lo + child + 1]:
+            child += 1
+        if not keys[lo + root] < keys[lo + child]:
+            return
+        a, b = lo + root, lo + child
+        keys[a], keys[b] = keys[b], keys[a]
+        if items is not None:
+            items[a], items[b] = items[b], items[a]
+        root = child
+
+# fallback when quick sort keeps picking bad pivots
+def _heapsort(keys, items, lo, hi):
+    size = hi - lo + 1
+    for root in range(size // 2 - 1, -1, -1):
+        _sift_down(keys, items, lo, root, size)
+    for end in range(size - 1, 0, -1):
+        keys[lo], keys[lo + end] = keys[lo + end], keys[lo]
+        if items is not None:
+            items[lo], items[lo + end] = items[lo + end], items[lo]
+        _sift_down(keys, items, lo, 0, end)
+
+# numeric fast path: a list that is all ints or all floats gets sorted by numpy instead of
+# comparing Python objects. anything else (or no numpy) goes through sorted()
+# bools and ints too big for int64 don't count as numeric here
+def numeric_sort(values, parallel_threshold=5_000_000, processes=None):
+    array = _as_numeric_array(values)
+    if array is None:
+        return sorted(values)
+    if len(array) >= parallel_threshold:
+        return parallel_sample_sort(array, processes).tolist()
+    return np.sort(array, kind="stable").tolist()
+
+def _as_numeric_array(values):
+    if np is None or not values:
+        return None
+    first = type(values[0])
+    if first not in (int, float) or any(type(x) is not first for x in values):
+        return None
+    try:
+        return np.array(values, dtype=np.int64 if first is int else np.float64)
+    except OverflowError:
+        return None
+
+# pool workers attach to the shared buffer once and sort slices of it in place
+_worker_array = None
+
+def _init_sample_sort_worker(name, dtype, size):
+    global _worker_array
+    memory = shared_memory.SharedMemory(name=name)
+    _worker_array = (memory, np.ndarray((size,), dtype=dtype, buffer=memory.buf))
+
+def _sort_bucket(bounds):
+    start, end = bounds
+    _worker_array[1][start:end].sort()
+
+# sample sort: pick splitters from a random sample, move every value into its bucket
+# (a stable counting pass on the small bucket numbers), then sort the buckets side by side
+# in a process pool. the data lives in shared memory so buckets are never pickled
+def parallel_sample_sort(array, processes=None, oversample=64, seed=0):
+    array = np.asarray(array)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(array) < 2 * processes:
+        return np.sort(array)
+
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(array, size=min(len(array), processes * oversample), replace=False))
+    splitters = sample[len(sample) // processes::len(sample) // processes][:processes - 1]
+    buckets = np.searchsorted(splitters, array, side="right").astype(np.uint16)
+    order = np.argsort(buckets, kind="stable")  # radix sort on uint16 keys, O(n)
+    ends = np.cumsum(np.bincount(buckets, minlength=processes))
+    starts = np.concatenate(([0], ends[:-1]))
+
+    memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    try:
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)
+        np.take(array, order, out=shared)
+        initargs = (memory.name, array.dtype, len(array))
+        with Pool(processes, initializer=_init_sample_sort_worker, initargs=initargs) as pool:
+            pool.map(_sort_bucket, [(int(a), int(b)) for a, b in zip(starts, ends) if b > a])
+        result = shared.copy()
+        del shared
+    finally:
+        memory.close()
+        memory.unlink()
+    return result
+
+# external merge sort for data that doesn't fit in memory
+# records are pickled as they come in and held as (key, bytes) until the run reaches
+# memory_budget bytes, then the run is sorted and spilled to a temp file. at the end
+# the run files are k-way merged with heapq.merge, reading one record per run at a time
+class ExternalSorter:
+    def __init__(self, key=None, memory_budget=64 * 1024 * 1024, tmp_dir=None):
+        self.key = key
+        self.memory_budget = memory_budget
+        self.tmp_dir = tmp_dir
+        self.stats = {}
+
+    # generator of the records in sorted order, stats has the throughput once it's used up
+    def sort(self, records):
+        start_time = time.perf_counter()
+        count = 0
+        runs = []
+        with tempfile.TemporaryDirectory(dir=self.tmp_dir) as folder:
+            run, run_bytes = [], 0
+            for record in records:
+                data = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+                run.append((self.key(record) if self.key else record, data))
+                run_bytes += len(data)
+                count += 1
+                if run_bytes >= self.memory_budget:
+                    runs.append(self._spill(run, folder, len(runs)))
+                    run, run_bytes = [], 0
+
+            if not runs:
+                # everything fit in one run, no need to touch the disk
+                run.sort(key=lambda pair: pair[0])
+                merged = (pickle.loads(data) for _, data in run)
+            else:
+                if run:
+                    runs.append(self._spill(run, folder, len(runs)))
+                run = None
+                merged = heapq.merge(*(self._read_run(name) for name in runs), key=self.key)
+
+            yield from merged
+
+        seconds = time.perf_counter() - start_time
+        self.stats = {
+            "records": count,
+            "runs": len(runs),
+            "seconds": seconds,
+            "records_per_second": count / seconds if seconds else 0.0,
+        }
+
+    def _spill(self, run, folder, number):
+        run.sort(key=lambda pair: pair[0])
+        name = os.path.join(folder, f"run{number}.bin")
+        with open(name, "wb") as f:
+            for _, data in run:
+                f.write(data)
+        return name
+
+    def _read_run(self, name):
+        with open(name, "rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+def external_sort(records, key=None, memory_budget=64 * 1024 * 1024, tmp_dir=None):
+    return ExternalSorter(key, memory_budget, tmp_dir).sort(records)
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    numbers = [rng.randrange(10 ** 9) for _ in range(2_000_000)]
+    start_time = time.perf_counter()
+    numeric_sort(numbers)
+    print(f"numeric_sort: {len(numbers)} ints in {time.perf_counter() - start_time:.3f}s")
+    if np is not None:
+        array = np.array(numbers)
+        start_time = time.perf_counter()
+        parallel_sample_sort(array, processes=4)
+        print(f"parallel_sample_sort (4 processes): {len(numbers)} ints in {time.perf_counter() - start_time:.3f}s")
+
+    records = ({"id": i, "amount": rng.uniform(50, 500)} for i in range(1_000_000))
+    sorter = ExternalSorter(key=lambda record: record["amount"], memory_budget=8 * 1024 * 1024)
+    previous = None
+    for record in sorter.sort(records):
+        assert previous is None or previous <= record["amount"]
+        previous = record["amount"]
+    stats = sorter.stats
+    print(f"External sort: {stats['records']} records in {stats['runs']} runs, "
+          f"{stats['seconds']:.2f}s ({stats['records_per_second']:,.0f} records/s)")
@@ -71,54 +71,130 @@ class AVLTree:
         current.right = self.rightRotate(current.right)
         return self.leftRotate(current)
 
+    # builds a perfectly balanced tree from sorted words, no rotations needed
+    @classmethod
+    def from_sorted(cls, words):
+        tree = cls()
+        unique = []
+        for word in words:
+            if not unique or word != unique[-1]:
+                unique.append(word)
+        if not unique:
+            return tree
+
+        # stack of (low, high, parent, is_left) ranges still to be built
+        stack = [(0, len(unique) - 1, None, False)]
+        while stack:
+            low, high, parent, is_left = stack.pop()
+            mid = (low + high) // 2
+            node = Node(unique[mid])
+            node.height = (high - low + 1).bit_length() - 1  # height of a balanced subtree of this size
+            if parent is None:
+                tree.root = node
+            elif is_left:
+                parent.left = node
+            else:
+                parent.right = node
+            if low < mid:
+                stack.append((low, mid - 1, node, True))
+            if mid < high:
+                stack.append((mid + 1, high, node, False))
+        return tree
+
     def insert(self, data):
-        self.root = self._insert(self.root, data)
-
-    def _insert(self, node, data):
-        if not node:
-            return Node(data)
-        elif data < node.data:
-            node.left = self._insert(node.left, data)
-        elif data > node.data:
-            node.right = self._insert(node.right, data)
+        # walk down and remember the path so we can rebalance on the way back up
+        path = []
+        node = self.root
+        while node:
+            if data == node.data:
+                return
+            path.append(node)
+            node = node.left if data < node.data else node.right
+
+        new = Node(data)
+        if not path:
+            self.root = new
+            return
+        if data < path[-1].data:
+            path[-1].left = new
         else:
-            return node
-
-        node.height = self.calcHeight(node)
-        balance = self.getBalance(node)
-
-        if balance > 1 and data < node.left.data:
-            return self.rightRotate(node)
-        if balance < -1 and data > node.right.data:
-            return self.leftRotate(node)
-        if balance > 1 and data > node.left.data:
-            return self.leftRightRotate(node)
-        if balance < -1 and data < node.right.data:
-            return self.rightLeftRotate(node)
-
-        return node
+            path[-1].right = new
+
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            old_height = node.height
+            node.height = self.calcHeight(node)
+            balance = self.getBalance(node)
+
+            subtree = node
+            if balance > 1 and data < node.left.data:
+                subtree = self.rightRotate(node)
+            elif balance < -1 and data > node.right.data:
+                subtree = self.leftRotate(node)
+            elif balance > 1 and data > node.left.data:
+                subtree = self.leftRightRotate(node)
+            elif balance < -1 and data < node.right.data:
+                subtree = self.rightLeftRotate(node)
+
+            if subtree is not node:
+                # a rotation puts the subtree back to its old height, so nothing above changes
+                if i == 0:
+                    self.root = subtree
+                elif path[i - 1].left is node:
+                    path[i - 1].left = subtree
+                else:
+                    path[i - 1].right = subtree
+                return
+            if node.height == old_height:
+                return
 
     def search(self, word):
-        return self._search(self.root, word)
-
-    def _search(self, node, word):
-        if node is None:
-            return False
-        if word == node.data:
-            return True
-        elif word < node.data:
-            return self._search(node.left, word)
-        else:
-            return self._search(node.right, word)
+        node = self.root
+        while node:
+            if word == node.data:
+                return True
+            node = node.left if word < node.data else node.right
+        return False
+
+    # inorder generator using a stack instead of recursion
+    def _iter_nodes(self, low=None):
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                # skip left subtrees that are all smaller than low
+                if low is not None and node.data < low:
+                    node = node.right
+                    continue
+                stack.append(node)
+                node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            yield node
+            node = node.right
+
+    def __iter__(self):
+        for node in self._iter_nodes():
+            yield node.data
 
     def inorder(self):
-        self._inorder(self.root)
-
-    def _inorder(self, node):
-        if node:
-            self._inorder(node.left)
+        for node in self._iter_nodes():
             print(f"{node.data} (balance: {self.getBalance(node)})")
-            self._inorder(node.right)
+
+    # all words between low and high (inclusive) in sorted order
+    def words_in_range(self, low, high):
+        for node in self._iter_nodes(low):
+            if node.data > high:
+                return
+            yield node.data
+
+    # autocomplete, e.g. words_with_prefix("ban")
+    def words_with_prefix(self, prefix):
+        for node in self._iter_nodes(prefix):
+            if not node.data.startswith(prefix):
+                return
+            yield node.data
 
 
 # spell check
@@ -128,11 +204,8 @@ def read_words_from_file(filename):
         return re.findall(r'\b[a-z]+\b', content)
 
 def load_dictionary(filename):
-    tree = AVLTree()
     words = read_words_from_file(filename)
-    for word in words:
-        tree.insert(word)
-    return tree
+    return AVLTree.from_sorted(sorted(words))
 
 def spell_check(document_filename, dictionary_tree):
     document_words = read_words_from_file(document_filename)
@@ -154,3 +227,6 @@ for word in sorted(misspelled_words):
 
 print("\n--- Dictionary (Inorder with Balance) ---")
 dictionary_tree.inorder()
+
+print("\n--- Words Starting With 'pe' ---")
+print(list(dictionary_tree.words_with_prefix("pe")))
@@ -1,3 +1,9 @@
+from array import array
+import math
+import random
+import time
+import zlib
+
 class Animal:
     def __init__(self, name, species, care_level):
         self.name = name
@@ -51,105 +57,444 @@ class HashTable:
             i += 1
         return None
 
-class CareLevelNode:
-    def __init__(self, level):
-        self.level = level
-        self.animals = []
-        self.left = None
-        self.right = None
+# open addressing hash table with linear probing
+# - one flat list per field instead of a list of buckets, capacity is a power of two so the
+#   slot is hash & mask
+# - the hash of every key is kept in an array('I') next to it, so probing compares plain ints
+#   without touching the key object, and resizing never rehashes
+# - crc32 instead of hash(), which is salted per process, so slots are the same on every run
+# - delete leaves a tombstone so probes carry on past the hole, tombstones are cleared on resize
+# - grows when live entries plus tombstones pass max_load of the capacity
+EMPTY = None
+TOMBSTONE = object()
+
+# the one place keys get hashed, 32 bits to match the hashes array
+def stable_hash(key):
+    return zlib.crc32(key.encode())
+
+class OpenAddressHashTable:
+    def __init__(self, capacity=16, max_load=0.7):
+        self.max_load = max_load
+        self.count = 0
+        self.tombstones = 0
+        self._allocate(max(8, 1 << (capacity - 1).bit_length()))
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.keys = [EMPTY] * capacity
+        self.values = [None] * capacity
+        self.hashes = array('I', [0]) * capacity
+
+    def __len__(self):
+        return self.count
+
+    # slot holding key, or -1
+    def _find(self, key):
+        key_hash = stable_hash(key)
+        keys, hashes, mask = self.keys, self.hashes, self.mask
+        index = key_hash & mask
+        while True:
+            current = keys[index]
+            if current is EMPTY:
+                return -1
+            if current is not TOMBSTONE and hashes[index] == key_hash and current == key:
+                return index
+            index = (index + 1) & mask
+
+    def insert(self, animal):
+        key = animal.name
+        key_hash = stable_hash(key)
+        keys, hashes, mask = self.keys, self.hashes, self.mask
+        index = key_hash & mask
+        first_tombstone = -1
+        while True:
+            current = keys[index]
+            if current is EMPTY:
+                break
+            if current is TOMBSTONE:
+                if first_tombstone < 0:
+                    first_tombstone = index
+            elif hashes[index] == key_hash and current == key:
+                self.values[index] = animal
+                return
+            index = (index + 1) & mask
+
+        # new key, reuse the first tombstone on the way if there was one
+        if first_tombstone >= 0:
+            index = first_tombstone
+            self.tombstones -= 1
+        keys[index] = key
+        hashes[index] = key_hash
+        self.values[index] = animal
+        self.count += 1
+        if self.count + self.tombstones > self.max_load * self.capacity:
+            self._resize()
+
+    def get(self, name):
+        index = self._find(name)
+        return self.values[index] if index >= 0 else None
+
+    def delete(self, name):
+        index = self._find(name)
+        if index < 0:
+            return None
+        removed = self.values[index]
+        self.keys[index] = TOMBSTONE
+        self.values[index] = None
+        self.count -= 1
+        self.tombstones += 1
+        return removed
+
+    # doubles when it's mostly live entries, otherwise just rebuilds at the same size to drop tombstones
+    def _resize(self):
+        old = zip(self.keys, self.hashes, self.values)
+        capacity = self.capacity * 2 if self.count > self.max_load * self.capacity / 2 else self.capacity
+        self._allocate(capacity)
+        self.tombstones = 0
+        keys, hashes, values, mask = self.keys, self.hashes, self.values, self.mask
+        for key, key_hash, value in old:
+            if key is EMPTY or key is TOMBSTONE:
+                continue
+            index = key_hash & mask
+            while keys[index] is not EMPTY:
+                index = (index + 1) & mask
+            keys[index] = key
+            hashes[index] = key_hash
+            values[index] = value
+
+# the old chained HashTable, OpenAddressHashTable and a plain dict doing the same
+# insert/get/delete work. the old table never resizes, so with its default 10 buckets
+# it only gets old_count animals (every lookup scans about count / 10 entries)
+# HashTable(size=count) is handed its final size up front, so the open addressing table is
+# run both growing from empty and pre-sized to make the insert numbers comparable
+class DictTable:
+    def __init__(self):
+        self.table = {}
+
+    def insert(self, animal):
+        self.table[animal.name] = animal
+
+    def get(self, name):
+        return self.table.get(name)
+
+    def delete(self, name):
+        return self.table.pop(name, None)
+
+def benchmark_hash_tables(count=1_000_000, old_count=10_000):
+    rng = random.Random(0)
+    species = ["lion", "tiger", "bear", "zebra", "giraffe", "penguin"]
+    animals = [Animal(f"animal{i}", rng.choice(species), rng.randint(1, 10)) for i in range(count)]
+    names = [animal.name for animal in animals]
+    rng.shuffle(names)
+
+    tables = [
+        ("HashTable(size=10)", HashTable, old_count),
+        (f"HashTable(size={count})", lambda: HashTable(count), count),
+        ("OpenAddressHashTable", OpenAddressHashTable, count),
+        (f"OpenAddressHashTable({count})", lambda: OpenAddressHashTable(count * 2), count),
+        ("dict", DictTable, count),
+    ]
+    for label, make, n in tables:
+        table = make()
+        timings = []
+        start = time.perf_counter()
+        for animal in animals[:n]:
+            table.insert(animal)
+        timings.append(time.perf_counter() - start)
+
+        lookups = [name for name in names if int(name[6:]) < n] if n < count else names
+        start = time.perf_counter()
+        for name in lookups:
+            table.get(name)
+        timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for name in lookups:
+            table.delete(name)
+        timings.append(time.perf_counter() - start)
 
-class CarePriorityBST:
+        insert_ns, get_ns, delete_ns = (seconds / n * 1e9 for seconds in timings)
+        print(f"{label:>30} {n:>9} animals: insert {insert_ns:8.0f} ns, get {get_ns:8.0f} ns, delete {delete_ns:8.0f} ns")
+
+# care level index: care levels only go from 1 to 10, so instead of a tree the animals sit
+# in one bucket per level (a dict name -> animal, so removing is O(1) too)
+# increase_all_care_levels doesn't touch any animal, it adds one to a global offset:
+#   care level = min(base + offset, MAX_CARE_LEVEL)
+# buckets are keyed by base level, so raising every level only moves the offset. buckets
+# that have hit the clamp are all level 10, top keeps track of which ones those are
+# animal.care_level is brought up to date when the animal comes back from a query
+MIN_CARE_LEVEL = 1
+MAX_CARE_LEVEL = 10
+
+# buckets only exist for whole levels, a 5.5 would be stored where no query ever looks
+def check_care_level_type(level):
+    if not isinstance(level, int) or isinstance(level, bool):
+        raise ValueError(f"care level must be a whole number, got {level!r}")
+
+class CareLevelIndex:
     def __init__(self):
-        self.root = None
+        self.buckets = {}  # base level -> {name: animal}
+        self.base_of = {}  # name -> base level
+        self.top = {}  # base levels at care level 10 (a dict used as an ordered set)
+        self.offset = 0
+
+    def __len__(self):
+        return len(self.base_of)
+
+    def _level(self, base):
+        return min(base + self.offset, MAX_CARE_LEVEL)
 
     def insert_by_care_level(self, animal):
-        self.root = self._insert(self.root, animal)
-
-    def _insert(self, node, animal):
-        if node is None:
-            node = CareLevelNode(animal.care_level)
-            node.animals.append(animal)
-            return node
-        if animal.care_level < node.level:
-            node.left = self._insert(node.left, animal)
-        elif animal.care_level > node.level:
-            node.right = self._insert(node.right, animal)
-        else:
-            node.animals.append(animal)
-        return node
+        check_care_level_type(animal.care_level)
+        level = min(max(animal.care_level, MIN_CARE_LEVEL), MAX_CARE_LEVEL)
+        self.remove(animal.name)
+        base = level - self.offset
+        bucket = self.buckets.get(base)
+        if bucket is None:
+            bucket = self.buckets[base] = {}
+            if level == MAX_CARE_LEVEL:
+                self.top[base] = None
+        bucket[animal.name] = animal
+        self.base_of[animal.name] = base
+        animal.care_level = level
+
+    def remove(self, name):
+        base = self.base_of.pop(name, None)
+        if base is None:
+            return None
+        bucket = self.buckets[base]
+        animal = bucket.pop(name)
+        if not bucket:
+            del self.buckets[base]
+            self.top.pop(base, None)
+        animal.care_level = self._level(base)
+        return animal
+
+    def level_of(self, name):
+        base = self.base_of.get(name)
+        return None if base is None else self._level(base)
+
+    def set_care_level(self, name, level):
+        check_care_level_type(level)
+        base = self.base_of.get(name)
+        if base is None:
+            return None
+        animal = self.buckets[base][name]
+        animal.care_level = level
+        self.insert_by_care_level(animal)
+        return animal
+
+    # base levels holding care levels min_level..max_level: one per level below 10, plus top
+    # fractional bounds get rounded inwards since only whole levels are stored
+    def _bases_in_range(self, min_level, max_level):
+        min_level = max(math.ceil(min_level), MIN_CARE_LEVEL)
+        max_level = math.floor(max_level)
+        bases = [level - self.offset for level in range(min_level, min(max_level, MAX_CARE_LEVEL - 1) + 1)]
+        if min_level <= MAX_CARE_LEVEL <= max_level:
+            bases.extend(sorted(self.top))
+        return bases
+
+    def count_in_range(self, min_level, max_level):
+        return sum(len(self.buckets.get(base, ())) for base in self._bases_in_range(min_level, max_level))
 
     def retrieve_in_range(self, min_level, max_level):
         results = []
-        self._retrieve_range(self.root, min_level, max_level, results)
+        for base in self._bases_in_range(min_level, max_level):
+            bucket = self.buckets.get(base)
+            if bucket:
+                level = self._level(base)
+                for animal in bucket.values():
+                    animal.care_level = level
+                results.extend(bucket.values())
         return results
 
-    def _retrieve_range(self, node, min_level, max_level, results):
-        if node is None:
-            return
-        if min_level <= node.level <= max_level:
-            results.extend(node.animals)
-        if node.level > min_level:
-            self._retrieve_range(node.left, min_level, max_level, results)
-        if node.level < max_level:
-            self._retrieve_range(node.right, min_level, max_level, results)
+    # O(1): the offset moves and the bucket that just reached 10 joins top
+    def increase_all_care_levels(self):
+        self.offset += 1
+        base = MAX_CARE_LEVEL - self.offset
+        if base in self.buckets:
+            self.top[base] = None
+
+# the old way of raising every level, rebuilding from a list, against CareLevelIndex
+def benchmark_care_index(count=1_000_000, increases=10):
+    rng = random.Random(0)
+    animals = [Animal(f"animal{i}", "zebra", rng.randint(1, 10)) for i in range(count)]
+    index = CareLevelIndex()
+    start = time.perf_counter()
+    for animal in sorted(animals, key=lambda animal: animal.care_level):
+        index.insert_by_care_level(animal)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(increases):
+        index.increase_all_care_levels()
+    lazy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(increases):
+        for animal in animals:
+            animal.care_level = min(animal.care_level + 1, MAX_CARE_LEVEL)
+    eager = time.perf_counter() - start
+
+    start = time.perf_counter()
+    intensive = index.count_in_range(8, 10)
+    count_time = time.perf_counter() - start
+    print(f"{count} animals: index built in order in {build:.2f}s, {increases} increases "
+          f"lazy {lazy * 1e6:.0f} us vs touching every animal {eager:.2f}s, "
+          f"care 8-10 counted in {count_time * 1e6:.0f} us ({intensive} animals)")
+
+# zoo registry: owns the primary store (name -> animal) and every secondary index, so an
+# insert, delete or care level change goes through one place and they can't drift apart
+#   animals       OpenAddressHashTable by name
+#   by_species    species -> {name: animal}
+#   care_levels   CareLevelIndex
+# everything is checked before anything changes, so a bad animal (or a bad one in a batch)
+# leaves the zoo as it was
+class Zoo:
+    def __init__(self):
+        self.animals = OpenAddressHashTable()
+        self.by_species = {}
+        self.care_levels = CareLevelIndex()
+
+    def __len__(self):
+        return len(self.animals)
+
+    def _check(self, animal):
+        if not isinstance(animal.name, str) or not animal.name:
+            raise ValueError(f"animal needs a name, got {animal.name!r}")
+        check_care_level_type(animal.care_level)
+        if not MIN_CARE_LEVEL <= animal.care_level <= MAX_CARE_LEVEL:
+            raise ValueError(f"care level for {animal.name} must be {MIN_CARE_LEVEL}-{MAX_CARE_LEVEL}, "
+                             f"got {animal.care_level}")
+
+    # an animal with a name that's already there replaces the old one
+    def insert(self, animal):
+        self._check(animal)
+        self._insert(animal)
+
+    def insert_many(self, animals):
+        animals = list(animals)
+        for animal in animals:
+            self._check(animal)
+        for animal in animals:
+            self._insert(animal)
+
+    def _insert(self, animal):
+        self.delete(animal.name)
+        self.animals.insert(animal)
+        self.by_species.setdefault(animal.species, {})[animal.name] = animal
+        self.care_levels.insert_by_care_level(animal)
+
+    def get(self, name):
+        animal = self.animals.get(name)
+        if animal is not None:
+            animal.care_level = self.care_levels.level_of(name)
+        return animal
+
+    def delete(self, name):
+        animal = self.animals.delete(name)
+        if animal is None:
+            return None
+        same_species = self.by_species[animal.species]
+        del same_species[name]
+        if not same_species:
+            del self.by_species[animal.species]
+        self.care_levels.remove(name)
+        return animal
+
+    def set_care_level(self, name, level):
+        check_care_level_type(level)
+        if not MIN_CARE_LEVEL <= level <= MAX_CARE_LEVEL:
+            raise ValueError(f"care level must be {MIN_CARE_LEVEL}-{MAX_CARE_LEVEL}, got {level}")
+        return self.care_levels.set_care_level(name, level)
 
     def increase_all_care_levels(self):
-        all_animals = []
-        self.rebuild_tree(self.root, all_animals)
-        self.root = None
-        for animal in all_animals:
-            animal.care_level = min(animal.care_level + 1, 10)
-            self.insert_by_care_level(animal)
-
-    def rebuild_tree(self, node, animals):
-        if node is None:
-            return
-        animals.extend(node.animals)
-        self.rebuild_tree(node.left, animals)
-        self.rebuild_tree(node.right, animals)
-
-
-zoo_hash_table = HashTable()
-zoo_bst = CarePriorityBST()
-
-animals = [
-    Animal("a", "a", 1),
-    Animal("b", "b", 2),
-    Animal("c", "c", 3),
-    Animal("d", "d", 4),
-    Animal("e", "e", 5),
-    Animal("f", "f", 6),
-    Animal("g", "g", 7),
-    Animal("h", "h", 8),
-    Animal("i", "i", 9),
-    Animal("j", "j", 10),
-]
-for animal in animals:
-    zoo_hash_table.insert(animal)
-    zoo_bst.insert_by_care_level(animal)
-
-print("find a:")
-print(zoo_hash_table.get("a"))
-
-print("\ndelete b:")
-deleted = zoo_hash_table.delete("b")
-print("Deleted:", deleted)
-
-print("\nincreasing care levels:")
-zoo_bst.increase_all_care_levels()
-
-print("\nbasic care (1-3):")
-animals_in_range = zoo_bst.retrieve_in_range(1, 3)
-for animal in animals_in_range:
-    print(animal)
-
-print("\nadvanced care (4-7):")
-animals_in_range = zoo_bst.retrieve_in_range(4, 7)
-for animal in animals_in_range:
-    print(animal)
-
-print("\nintensive care (8-10):")
-animals_in_range = zoo_bst.retrieve_in_range(8, 10)
-for animal in animals_in_range:
-    print(animal)
+        self.care_levels.increase_all_care_levels()
+
+    def retrieve_in_range(self, min_level, max_level):
+        return self.care_levels.retrieve_in_range(min_level, max_level)
+
+    # care_level on a stored animal goes stale after increase_all_care_levels, so refresh it
+    def of_species(self, species):
+        animals = list(self.by_species.get(species, {}).values())
+        for animal in animals:
+            animal.care_level = self.care_levels.level_of(animal.name)
+        return animals
+
+    # animals matching every filter given. the smaller of the two indexes is walked and each
+    # animal is checked against the other one in O(1), nothing scans the whole zoo
+    def find(self, species=None, min_care=MIN_CARE_LEVEL, max_care=MAX_CARE_LEVEL):
+        if species is None:
+            return self.retrieve_in_range(min_care, max_care)
+        same_species = self.by_species.get(species, {})
+        if len(same_species) <= self.care_levels.count_in_range(min_care, max_care):
+            results = []
+            for name, animal in same_species.items():
+                level = self.care_levels.level_of(name)
+                if min_care <= level <= max_care:
+                    animal.care_level = level
+                    results.append(animal)
+            return results
+        return [animal for animal in self.retrieve_in_range(min_care, max_care)
+                if animal.name in same_species]
+
+
+# the demo and the 1M animal benchmarks only run when this file is run directly
+if __name__ == "__main__":
+    zoo = Zoo()
+
+    animals = [
+        Animal("a", "a", 1),
+        Animal("b", "b", 2),
+        Animal("c", "c", 3),
+        Animal("d", "d", 4),
+        Animal("e", "e", 5),
+        Animal("f", "f", 6),
+        Animal("g", "g", 7),
+        Animal("h", "h", 8),
+        Animal("i", "i", 9),
+        Animal("j", "j", 10),
+    ]
+    zoo.insert_many(animals)
+
+    print("find a:")
+    print(zoo.get("a"))
+
+    print("\ndelete b:")
+    deleted = zoo.delete("b")
+    print("Deleted:", deleted)
+
+    print("\nincreasing care levels:")
+    zoo.increase_all_care_levels()
+
+    print("\nbasic care (1-3):")
+    animals_in_range = zoo.retrieve_in_range(1, 3)
+    for animal in animals_in_range:
+        print(animal)
+
+    print("\nadvanced care (4-7):")
+    animals_in_range = zoo.retrieve_in_range(4, 7)
+    for animal in animals_in_range:
+        print(animal)
+
+    print("\nintensive care (8-10):")
+    animals_in_range = zoo.retrieve_in_range(8, 10)
+    for animal in animals_in_range:
+        print(animal)
+
+    print("\nspecies h with care 8-10:")
+    for animal in zoo.find(species="h", min_care=8, max_care=10):
+        print(animal)
+
+    print("\nbad batch (care level 11) is rejected whole:")
+    try:
+        zoo.insert_many([Animal("k", "k", 5), Animal("l", "l", 11)])
+    except ValueError as error:
+        print(error, "- k added:", zoo.get("k") is not None)
+
+    print("\nhash table benchmark:")
+    benchmark_hash_tables()
 
+    print("\ncare level index benchmark:")
+    benchmark_care_index()